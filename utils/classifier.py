@@ -1,20 +1,39 @@
 import os
+
+# ---------------------------
+# TF CPU threading (must be set before tensorflow is first imported)
+# ---------------------------
+# Size the pools to the CPUs this process may actually run on (container
+# cpusets), instead of TF's host-wide default. Two inter-op threads let the
+# classifier and U-Net graphs run side by side. Any value already set in
+# the environment wins.
+_N_CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+os.environ.setdefault("TF_NUM_INTRAOP_THREADS", str(_N_CPUS))
+os.environ.setdefault("TF_NUM_INTEROP_THREADS", "2")
+os.environ.setdefault("OMP_NUM_THREADS", str(_N_CPUS))
+os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "1")
+
+import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 import streamlit as st
+from utils.image_io import read_image, resize_to
+from utils.tflite_model import load_inference_model
 
 # ---------------------------
 # Load model
 # ---------------------------
 @st.cache_resource
 def load_classifier(path):
-    # compile=False ensures it works for inference-only
-    return load_model(path, compile=False)
+    # Batch dim left open in the traced graph, so classify_images batches
+    # compile once per batch size
+    model = load_inference_model(path, num_threads=_N_CPUS)
+    model._class_names = load_class_names()
+    return model
 
 # ---------------------------
 # Class names
 # ---------------------------
+@st.cache_data
 def load_class_names(classes_path="classes.npy", fallback=None):
     if os.path.exists(classes_path):
         return list(np.load(classes_path, allow_pickle=True))
@@ -23,33 +42,63 @@ def load_class_names(classes_path="classes.npy", fallback=None):
 # ---------------------------
 # Preprocessing + Classification
 # ---------------------------
-def _get_input_hw_c(model):
-    shape = model.input_shape
-    if isinstance(shape, (list, tuple)) and isinstance(shape[0], (list, tuple)):
-        shape = shape[0]
-    _, H, W, C = shape
-    return (H, W, C)
-
-def _preprocess_image(img_pil, mode="none"):
-    x = image.img_to_array(img_pil)
-    if mode == "efficientnet":
-        from tensorflow.keras.applications.efficientnet import preprocess_input
-        x = preprocess_input(x)
-    elif mode == "rescale01":
-        x = x.astype(np.float32) / 255.0
-    elif mode == "none":
-        x = x.astype(np.float32)
-    else:
+_PREPROCESS_SCALE = {
+    "none": np.float32(1.0),
+    "rescale01": np.float32(1.0 / 255.0),
+    # Keras' efficientnet.preprocess_input is a pass-through (rescaling is
+    # part of the model itself)
+    "efficientnet": np.float32(1.0),
+}
+
+def _preprocess_image(img_bgr, out, mode="none", quant=None):
+    # Resize + BGR->RGB + cast/scale in one pass, written straight into `out`.
+    # With `quant=(scale, zero_point)` the scaling is folded into the uint8
+    # quantization of an int8 TFLite model's input.
+    if mode not in _PREPROCESS_SCALE:
         raise ValueError("mode must be 'none' | 'rescale01' | 'efficientnet'")
-    return np.expand_dims(x, axis=0)
-
-def classify_image(img_path, model, class_names, preprocess="none"):
-    # Use model’s own input size
-    H, W, _ = _get_input_hw_c(model)
-    pil_img = image.load_img(img_path, target_size=(H, W))
-    x = _preprocess_image(pil_img, mode=preprocess)
-
-    preds = model.predict(x, verbose=0)
-    pred_idx = int(np.argmax(preds[0]))
-    confidence = float(preds[0][pred_idx]) * 100.0
-    return class_names[pred_idx], confidence
+    H, W, _ = out.shape
+    img = resize_to(img_bgr, (W, H))
+    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+    if quant:
+        q_scale, q_zero = quant
+        out[...] = cv2.convertScaleAbs(img, alpha=_PREPROCESS_SCALE[mode] / q_scale, beta=q_zero)
+    elif _PREPROCESS_SCALE[mode] == 1.0:
+        # 'none' / 'efficientnet': a plain uint8 -> float32 cast, no multiply
+        np.copyto(out, img, casting="unsafe")
+    else:
+        np.multiply(img, _PREPROCESS_SCALE[mode], out=out, casting="unsafe")
+    return out
+
+def _top1(preds, class_names):
+    idx = preds.argmax(axis=1)
+    conf = preds[np.arange(len(idx)), idx] * 100.0
+    return [(class_names[i], float(c)) for i, c in zip(idx, conf)]
+
+def classify_image(img, model, class_names=None, preprocess="none"):
+    # `img` may be a path, encoded bytes or a decoded BGR ndarray
+    if class_names is None:
+        class_names = model._class_names
+
+    img = read_image(img, cv2.IMREAD_COLOR)
+
+    with model._inlock:
+        _preprocess_image(img, model._inbuf[0], mode=preprocess, quant=model._in_quant)
+        preds = model._infer(model._inbuf)
+
+    return _top1(preds, class_names)[0]
+
+def classify_images(imgs, model, class_names=None, preprocess="none"):
+    # Batched classify_image: N images share one graph call
+    if not imgs:
+        return []
+    if class_names is None:
+        class_names = model._class_names
+
+    batch = np.empty((len(imgs), *model._hwc), model._indtype)
+    for slot, img in zip(batch, imgs):
+        _preprocess_image(read_image(img, cv2.IMREAD_COLOR), slot, mode=preprocess, quant=model._in_quant)
+
+    with model._inlock:
+        preds = model._infer(batch)
+
+    return _top1(preds, class_names)
@@ -0,0 +1,85 @@
+import argparse
+import glob
+import os
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+# ---------------------------
+# One-off Keras -> TFLite conversion
+#
+#   python -m utils.convert_to_tflite [models/final_model.keras] [--int8 uploads | --fp16]
+#   python -m utils.convert_to_tflite models/best_unetmodel.keras --kind unet [--int8 uploads | --fp16]
+#
+# Writes the .tflite next to the .keras file; load_classifier / load_unet
+# pick it up automatically when present.
+# ---------------------------
+def _representative_dataset(model, calibration_dir, kind="classifier", preprocess="none", limit=50):
+    # Calibration samples go through the same preprocessing as inference
+    import cv2
+    from utils.classifier import _preprocess_image
+    from utils.image_io import resize_to
+    from utils.tflite_model import input_hwc
+
+    H, W, C = input_hwc(model)
+    paths = sorted(
+        p for ext in ("jpg", "jpeg", "png")
+        for p in glob.glob(os.path.join(calibration_dir, f"*.{ext}"))
+    )[:limit]
+    if not paths:
+        raise FileNotFoundError(f"No calibration images found in {calibration_dir}")
+
+    def gen():
+        buf = np.empty((1, H, W, C), np.float32)
+        for p in paths:
+            if kind == "unet":
+                img = cv2.imread(p, cv2.IMREAD_GRAYSCALE)
+                if img is None:
+                    continue
+                np.multiply(resize_to(img, (W, H)), np.float32(1.0 / 255.0), out=buf[0, :, :, 0], casting="unsafe")
+            else:
+                img = cv2.imread(p, cv2.IMREAD_COLOR)
+                if img is None:
+                    continue
+                _preprocess_image(img, buf[0], mode=preprocess)
+            yield [buf.copy()]
+    return gen
+
+def convert_to_tflite(keras_path, tflite_path=None, optimize=True, calibration_dir=None,
+                      kind="classifier", preprocess="none", fp16=False):
+    tflite_path = tflite_path or os.path.splitext(keras_path)[0] + ".tflite"
+
+    model = load_model(keras_path, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if optimize or calibration_dir or fp16:
+        # Dynamic-range quantization: int8 weights, float32 I/O
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if fp16:
+        # FP16 weights: half the size, near-lossless
+        converter.target_spec.supported_types = [tf.float16]
+    elif calibration_dir:
+        # Full int8 with calibrated activations. The classifier takes uint8
+        # input directly; the U-Net keeps float32 I/O (its caller feeds /255 floats)
+        converter.representative_dataset = _representative_dataset(model, calibration_dir, kind, preprocess)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        if kind == "classifier":
+            converter.inference_input_type = tf.uint8
+            converter.inference_output_type = tf.float32
+
+    with open(tflite_path, "wb") as f:
+        f.write(converter.convert())
+    return tflite_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a Keras model to TFLite.")
+    parser.add_argument("keras_path", nargs="?", default="models/final_model.keras")
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--kind", default="classifier", choices=["classifier", "unet"])
+    quant = parser.add_mutually_exclusive_group()
+    quant.add_argument("--int8", metavar="CALIBRATION_DIR", default=None,
+                       help="full int8 quantization, calibrated on the MRIs in this folder")
+    quant.add_argument("--fp16", action="store_true", help="float16 weight quantization")
+    parser.add_argument("--preprocess", default="none", choices=["none", "rescale01", "efficientnet"])
+    args = parser.parse_args()
+    print(convert_to_tflite(args.keras_path, args.output, calibration_dir=args.int8,
+                            kind=args.kind, preprocess=args.preprocess, fp16=args.fp16))
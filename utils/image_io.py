@@ -0,0 +1,64 @@
+import os
+import cv2
+import numpy as np
+
+# ---------------------------
+# Image decoding
+# ---------------------------
+def read_image(src, flags=cv2.IMREAD_COLOR):
+    """
+    Decode an image from a file path, encoded bytes or an already decoded ndarray.
+
+    Args:
+        src: Path, bytes-like (e.g. ``uploaded_file.getbuffer()``) or ndarray
+            (decoded BGR/grayscale image, or a 1-D buffer of encoded bytes).
+        flags: cv2.IMREAD_COLOR (BGR) or cv2.IMREAD_GRAYSCALE.
+
+    Returns:
+        np.ndarray: Decoded uint8 image. A decoded ndarray is returned as-is
+        (or converted into a new array), never modified in place, so one
+        decode can be shared by concurrent consumers.
+
+    Raises:
+        ValueError: If `src` cannot be read or decoded (including empty input).
+    """
+    if isinstance(src, (str, os.PathLike)):
+        img = cv2.imread(os.fspath(src), flags)
+    elif isinstance(src, np.ndarray) and src.ndim in (2, 3) and src.dtype == np.uint8:
+        img = src
+        if flags == cv2.IMREAD_GRAYSCALE and img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        elif flags == cv2.IMREAD_COLOR and img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    else:
+        try:
+            img = cv2.imdecode(np.frombuffer(src, np.uint8), flags)
+        except cv2.error:
+            # e.g. an empty buffer, which imdecode rejects instead of returning None
+            img = None
+
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+# ---------------------------
+# Model-input resizing
+# ---------------------------
+def resize_to(img, size):
+    """
+    Resize an image to a model's input size, the same way for every model.
+
+    INTER_AREA when shrinking in both dimensions (the usual case for MRIs); it
+    degrades to nearest-neighbour when enlarging, so anything else is resized
+    bilinearly.
+
+    Args:
+        img: Decoded image (H x W or H x W x C).
+        size: Target (width, height), as for cv2.resize.
+
+    Returns:
+        np.ndarray: A new, resized image.
+    """
+    W, H = size
+    shrink = img.shape[0] >= H and img.shape[1] >= W
+    return cv2.resize(img, (W, H), interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LINEAR)
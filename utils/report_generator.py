@@ -1,6 +1,10 @@
+import copy
 import datetime
+import functools
 import io
-import os
+import string
+from concurrent.futures import ThreadPoolExecutor
+import cv2
 from reportlab.lib.pagesizes import A4, letter
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle,
@@ -12,6 +16,7 @@ from reportlab.lib.units import inch
 from reportlab.platypus.flowables import HRFlowable
 from reportlab.graphics.shapes import Drawing, Rect
 from reportlab.graphics import renderPDF
+from utils.image_io import read_image
 
 
 # Comprehensive tumor information database
@@ -178,22 +183,211 @@ def create_logo_section():
     return drawing
 
 
-def generate_pdf_report(original_path, overlay_path, pred_class, confidence):
+# Built once at import: styles and the static reference-guide / disclaimer
+# flowables are identical for every report
+_CUSTOM_STYLES = create_custom_styles()
+
+_DISCLAIMERS = [
+    "<b>AI Technology Limitations:</b> This analysis is performed by artificial intelligence and machine learning algorithms. While highly accurate, AI systems can make errors and should never replace professional medical judgment.",
+    
+    "<b>Not a Medical Diagnosis:</b> This report provides AI-assisted analysis for informational purposes only. It does not constitute a medical diagnosis, treatment recommendation, or medical advice.",
+    
+    "<b>Professional Medical Consultation Required:</b> Any abnormal findings require immediate consultation with qualified medical professionals including radiologists, neurologists, or neurosurgeons.",
+    
+    "<b>Imaging Limitations:</b> MRI interpretation depends on image quality, patient positioning, contrast usage, and scanning parameters. Some conditions may not be visible on MRI.",
+    
+    "<b>Emergency Situations:</b> If experiencing severe headaches, seizures, vision changes, or neurological symptoms, seek immediate medical attention regardless of this AI analysis.",
+    
+    "<b>Second Opinion Recommended:</b> For any positive findings, obtain a second opinion from qualified medical professionals and consider additional diagnostic tests.",
+    
+    "<b>Data Privacy:</b> Medical imaging data processed by this system is handled according to healthcare privacy regulations. No personal health information is stored permanently.",
+    
+    "<b>Regulatory Status:</b> This AI system is for research and educational purposes. It is not FDA-approved for clinical diagnosis."
+]
+
+
+def _build_reference_flowables(custom_styles):
+    """Flowables for the "BRAIN TUMOR REFERENCE GUIDE" page."""
+    return (
+        Paragraph("BRAIN TUMOR REFERENCE GUIDE", custom_styles['heading']),
+        Paragraph("Complete overview of brain tumor types analyzed by TumorX AI system:", custom_styles['body']),
+        Spacer(1, 15),
+    )
+
+
+def _build_reference_cells(custom_styles):
+    """One Paragraph per tumor type, laid out as rows of a single reference table."""
+    cells = []
+    for tumor_name, tumor_info in TUMOR_INFO.items():
+        if tumor_name != "No Tumor":
+            text = f"<b>{tumor_name}</b><br/>{tumor_info['description']}"
+            if 'prevalence' in tumor_info:
+                text += f"<br/><i>Prevalence: {tumor_info['prevalence']}</i>"
+            cells.append(Paragraph(text, custom_styles['body']))
+    return tuple(cells)
+
+
+def _build_disclaimer_flowables(custom_styles):
+    """Flowables for the "MEDICAL DISCLAIMERS" page."""
+    flowables = [Paragraph("MEDICAL DISCLAIMERS & IMPORTANT INFORMATION", custom_styles['heading'])]
+    for disclaimer in _DISCLAIMERS:
+        flowables.append(Paragraph(disclaimer, custom_styles['body']))
+        flowables.append(Spacer(1, 10))
+    return tuple(flowables)
+
+
+# Bullet lists pre-joined into one <br/>-separated Paragraph source per section,
+# so each section costs one XML parse/wrap instead of one per bullet
+_TUMOR_BULLETS = {
+    name: {
+        key: "<br/>".join(f"• {item}" for item in value)
+        for key, value in info.items() if isinstance(value, list)
+    }
+    for name, info in TUMOR_INFO.items()
+}
+
+_REFERENCE_FLOWABLES = _build_reference_flowables(_CUSTOM_STYLES)
+_REFERENCE_CELLS = _build_reference_cells(_CUSTOM_STYLES)
+_REFERENCE_TABLE_STYLE = TableStyle([
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+])
+_DISCLAIMER_FLOWABLES = _build_disclaimer_flowables(_CUSTOM_STYLES)
+
+# Footer markup is fixed apart from the date; only that is substituted per report
+_FOOTER_TMPL = string.Template("""
+    <b>TumorX AI System</b><br/>
+    Advanced Brain Tumor Detection Platform<br/>
+    Powered by Deep Learning & Computer Vision<br/>
+    For research and educational use only<br/>
+    <i>Generated on $date</i>
+    """)
+_FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=_CUSTOM_STYLES['normal'],
+    fontSize=9,
+    alignment=1,  # Center alignment
+    textColor=colors.grey
+)
+
+_INFO_TABLE_STYLE = TableStyle([
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+])
+
+_IMAGE_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+])
+
+_RESULT_TABLE_CMDS = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.9, 0.9, 0.95)),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ALIGN', (0, 0), (-1, -1), "LEFT"),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('FONTNAME', (1, 2), (1, 2), 'Helvetica-Bold'),
+]
+
+# The only dynamic cell is the risk-assessment colour, so both variants are
+# built up front, keyed by "tumor detected"
+_RESULT_TABLE_STYLES = {
+    detected: TableStyle(_RESULT_TABLE_CMDS + [('TEXTCOLOR', (1, 2), (1, 2), colors.red if detected else colors.green)])
+    for detected in (True, False)
+}
+
+
+# Image loading/encoding (file reads, cv2.imencode) releases the GIL, so it
+# runs here while the rest of the story is assembled
+_IMAGE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report-images")
+
+# Whole-report builds for generate_pdf_report_async; kept separate from
+# _IMAGE_EXECUTOR so a build never waits on its own pool
+_PDF_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report-build")
+
+
+@functools.lru_cache(maxsize=256)
+def _result_rows(pred_class, confidence):
+    """Rows of the AI DIAGNOSTIC RESULTS table; re-processed scans hit the cache."""
+    return (
+        ("Classification Result", pred_class),
+        ("Confidence Level", f"{confidence:.2f}%"),
+        ("Risk Assessment", "HIGH PRIORITY - Requires medical attention" if pred_class != "No Tumor" else "NORMAL - No tumor detected"),
+    )
+
+
+def _fresh(flowables):
+    """Shallow copies of prebuilt flowables; layout state set by doc.build stays per report."""
+    return [copy.copy(f) for f in flowables]
+
+
+# Embedded MRI images are rendered at 2.5"; anything above ~150 DPI only bloats the PDF
+_EMBED_DPI = 150
+_EMBED_JPEG_QUALITY = 85
+
+
+def _rl_image(src, width, height):
+    """
+    Build an RLImage, downscaled to print size and JPEG-encoded in memory.
+
+    `src` may be a file path, encoded bytes, a binary file-like object (e.g. BytesIO)
+    or a decoded BGR ndarray; returns None if it is missing or cannot be decoded.
+    """
+    if src is None:
+        return None
+    if hasattr(src, 'getvalue'):
+        # BytesIO / UploadedFile: whole buffer, whatever the stream position
+        src = src.getvalue()
+    elif hasattr(src, 'read'):
+        if src.seekable():
+            src.seek(0)
+        src = src.read()
+    try:
+        img = read_image(src, cv2.IMREAD_COLOR)
+    except ValueError:
+        return None
+
+    px_w, px_h = int(width / inch * _EMBED_DPI), int(height / inch * _EMBED_DPI)
+    if img.shape[1] > px_w or img.shape[0] > px_h:
+        img = cv2.resize(img, (px_w, px_h), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, _EMBED_JPEG_QUALITY])
+    if not ok:
+        return None
+    return RLImage(io.BytesIO(encoded.tobytes()), width=width, height=height)
+
+
+def generate_pdf_report(original, overlay, pred_class, confidence, output=None):
     """
     Generate comprehensive PDF report containing MRI images, AI prediction, and medical information.
     
     Args:
-        original_path (str): Path to original MRI image.
-        overlay_path (str): Path to overlay heatmap image.
+        original (str | bytes | BytesIO | np.ndarray): Original MRI image, as a path,
+            encoded bytes/stream or decoded BGR ndarray.
+        overlay (str | bytes | BytesIO | np.ndarray | None): Overlay heatmap, same forms.
         pred_class (str): Predicted tumor type.
         confidence (float): Prediction confidence (0-1).
+        output (file-like | str, optional): Writable stream or path to write the PDF to
+            directly. Defaults to an in-memory buffer.
     
     Returns:
-        BytesIO: In-memory PDF file buffer.
+        BytesIO | None: In-memory PDF file buffer, or None when `output` was given.
     """
-    buffer = io.BytesIO()
+    original_future = _IMAGE_EXECUTOR.submit(_rl_image, original, 2.5*inch, 2.5*inch)
+    overlay_future = _IMAGE_EXECUTOR.submit(_rl_image, overlay, 2.5*inch, 2.5*inch)
+
+    buffer = io.BytesIO() if output is None else None
     doc = SimpleDocTemplate(
-        buffer, 
+        output if output is not None else buffer, 
         pagesize=A4,
         rightMargin=72,
         leftMargin=72,
@@ -201,7 +395,13 @@ def generate_pdf_report(original_path, overlay_path, pred_class, confidence):
         bottomMargin=72
     )
     story = []
-    custom_styles = create_custom_styles()
+    custom_styles = _CUSTOM_STYLES
+
+    # One timestamp for the whole report, so header, ID and footer agree
+    now = datetime.datetime.now()
+    now_full = now.strftime('%B %d, %Y at %H:%M:%S')
+    now_id = now.strftime('%Y%m%d%H%M%S')
+    now_date = now.strftime('%B %d, %Y')
 
     # --- Header with Logo Section ---
     story.append(Paragraph("TUMORX", custom_styles['title']))
@@ -211,20 +411,15 @@ def generate_pdf_report(original_path, overlay_path, pred_class, confidence):
 
     # --- Report Information ---
     report_info = [
-        ["Report Generated:", datetime.datetime.now().strftime('%B %d, %Y at %H:%M:%S')],
+        ["Report Generated:", now_full],
         ["Analysis Method:", "Deep Learning Neural Networks"],
         ["Model Version:", "TumorX v2.1.0"],
-        ["Report ID:", f"TX-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"]
+        ["Report ID:", f"TX-{now_id}"]
     ]
     #["Report ID:", f"TX-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"]
 
     info_table = Table(report_info, colWidths=[2*inch, 3*inch])
-    info_table.setStyle(TableStyle([
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
+    info_table.setStyle(_INFO_TABLE_STYLE)
     story.append(info_table)
     story.append(Spacer(1, 30))
 
@@ -235,28 +430,23 @@ def generate_pdf_report(original_path, overlay_path, pred_class, confidence):
     image_data = []
     image_row = []
     
-    if original_path and os.path.exists(original_path):
+    original_image = original_future.result()
+    if original_image is not None:
         image_row.append([
             Paragraph("<b>Original MRI Scan</b>", custom_styles['body']),
-            RLImage(original_path, width=2.5*inch, height=2.5*inch)
+            original_image
         ])
     
-    if overlay_path and os.path.exists(overlay_path):
+    overlay_image = overlay_future.result()
+    if overlay_image is not None:
         image_row.append([
             Paragraph("<b>AI Segmentation Analysis</b>", custom_styles['body']),
-            RLImage(overlay_path, width=2.5*inch, height=2.5*inch)
+            overlay_image
         ])
     
     if image_row:
         image_table = Table([image_row], colWidths=[2.5*inch, 2.5*inch])
-        image_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ]))
+        image_table.setStyle(_IMAGE_TABLE_STYLE)
         story.append(image_table)
         story.append(Spacer(1, 30))
 
@@ -264,27 +454,11 @@ def generate_pdf_report(original_path, overlay_path, pred_class, confidence):
     story.append(Paragraph("AI DIAGNOSTIC RESULTS", custom_styles['heading']))
     
     # Main result table
-    confidence_percentage = confidence * 1 if confidence else 0
-    result_color = colors.red if pred_class != "No Tumor" else colors.green
-    
-    result_data = [
-        ["Classification Result", pred_class],
-        ["Confidence Level", f"{confidence_percentage:.2f}%"],
-        ["Risk Assessment", "HIGH PRIORITY - Requires medical attention" if pred_class != "No Tumor" else "NORMAL - No tumor detected"]
-    ]
+    # Table copies cells into its own lists, so the cached tuples go in as is
+    result_data = _result_rows(pred_class, confidence or 0)
     
     result_table = Table(result_data, colWidths=[2*inch, 3.5*inch])
-    result_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.9, 0.9, 0.95)),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ALIGN', (0, 0), (-1, -1), "LEFT"),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TEXTCOLOR', (1, 2), (1, 2), result_color),
-        ('FONTNAME', (1, 2), (1, 2), 'Helvetica-Bold'),
-    ]))
+    result_table.setStyle(_RESULT_TABLE_STYLES[pred_class != "No Tumor"])
     story.append(result_table)
     story.append(Spacer(1, 30))
 
@@ -301,22 +475,19 @@ def generate_pdf_report(original_path, overlay_path, pred_class, confidence):
             # Types/Subtypes
             if 'types' in tumor_data:
                 story.append(Paragraph("<b>Common Types/Subtypes:</b>", custom_styles['body']))
-                for tumor_type in tumor_data['types']:
-                    story.append(Paragraph(f"• {tumor_type}", custom_styles['body']))
+                story.append(Paragraph(_TUMOR_BULLETS[pred_class]['types'], custom_styles['body']))
                 story.append(Spacer(1, 10))
             
             # Symptoms
             if 'symptoms' in tumor_data:
                 story.append(Paragraph("<b>Common Symptoms:</b>", custom_styles['body']))
-                for symptom in tumor_data['symptoms']:
-                    story.append(Paragraph(f"• {symptom}", custom_styles['body']))
+                story.append(Paragraph(_TUMOR_BULLETS[pred_class]['symptoms'], custom_styles['body']))
                 story.append(Spacer(1, 10))
             
             # Treatment Options
             if 'treatment_options' in tumor_data:
                 story.append(Paragraph("<b>Treatment Options:</b>", custom_styles['body']))
-                for treatment in tumor_data['treatment_options']:
-                    story.append(Paragraph(f"• {treatment}", custom_styles['body']))
+                story.append(Paragraph(_TUMOR_BULLETS[pred_class]['treatment_options'], custom_styles['body']))
                 story.append(Spacer(1, 10))
             
             # Prognosis
@@ -334,78 +505,49 @@ def generate_pdf_report(original_path, overlay_path, pred_class, confidence):
         else:  # No Tumor case
             if 'normal_findings' in tumor_data:
                 story.append(Paragraph("<b>Normal Findings Detected:</b>", custom_styles['body']))
-                for finding in tumor_data['normal_findings']:
-                    story.append(Paragraph(f"• {finding}", custom_styles['body']))
+                story.append(Paragraph(_TUMOR_BULLETS[pred_class]['normal_findings'], custom_styles['body']))
                 story.append(Spacer(1, 10))
             
             if 'recommendations' in tumor_data:
                 story.append(Paragraph("<b>Recommendations:</b>", custom_styles['body']))
-                for rec in tumor_data['recommendations']:
-                    story.append(Paragraph(f"• {rec}", custom_styles['body']))
+                story.append(Paragraph(_TUMOR_BULLETS[pred_class]['recommendations'], custom_styles['body']))
                 story.append(Spacer(1, 10))
 
     # --- All Tumor Types Reference ---
     story.append(PageBreak())
-    story.append(Paragraph("BRAIN TUMOR REFERENCE GUIDE", custom_styles['heading']))
-    story.append(Paragraph("Complete overview of brain tumor types analyzed by TumorX AI system:", custom_styles['body']))
-    story.append(Spacer(1, 15))
-    
-    for tumor_name, tumor_info in TUMOR_INFO.items():
-        if tumor_name != "No Tumor":
-            story.append(Paragraph(f"<b>{tumor_name}</b>", custom_styles['body']))
-            story.append(Paragraph(tumor_info['description'], custom_styles['body']))
-            if 'prevalence' in tumor_info:
-                story.append(Paragraph(f"<i>Prevalence: {tumor_info['prevalence']}</i>", custom_styles['body']))
-            story.append(Spacer(1, 15))
+    story.extend(_fresh(_REFERENCE_FLOWABLES))
+    # A single table flowable instead of ~4 flowables per tumor type
+    story.append(Table([[cell] for cell in _fresh(_REFERENCE_CELLS)], colWidths=[6*inch],
+                       style=_REFERENCE_TABLE_STYLE))
 
     # --- Medical Disclaimers ---
     story.append(PageBreak())
-    story.append(Paragraph("MEDICAL DISCLAIMERS & IMPORTANT INFORMATION", custom_styles['heading']))
-    
-    disclaimers = [
-        "<b>AI Technology Limitations:</b> This analysis is performed by artificial intelligence and machine learning algorithms. While highly accurate, AI systems can make errors and should never replace professional medical judgment.",
-        
-        "<b>Not a Medical Diagnosis:</b> This report provides AI-assisted analysis for informational purposes only. It does not constitute a medical diagnosis, treatment recommendation, or medical advice.",
-        
-        "<b>Professional Medical Consultation Required:</b> Any abnormal findings require immediate consultation with qualified medical professionals including radiologists, neurologists, or neurosurgeons.",
-        
-        "<b>Imaging Limitations:</b> MRI interpretation depends on image quality, patient positioning, contrast usage, and scanning parameters. Some conditions may not be visible on MRI.",
-        
-        "<b>Emergency Situations:</b> If experiencing severe headaches, seizures, vision changes, or neurological symptoms, seek immediate medical attention regardless of this AI analysis.",
-        
-        "<b>Second Opinion Recommended:</b> For any positive findings, obtain a second opinion from qualified medical professionals and consider additional diagnostic tests.",
-        
-        "<b>Data Privacy:</b> Medical imaging data processed by this system is handled according to healthcare privacy regulations. No personal health information is stored permanently.",
-        
-        "<b>Regulatory Status:</b> This AI system is for research and educational purposes. It is not FDA-approved for clinical diagnosis."
-    ]
-    
-    for disclaimer in disclaimers:
-        story.append(Paragraph(disclaimer, custom_styles['body']))
-        story.append(Spacer(1, 10))
+    story.extend(_fresh(_DISCLAIMER_FLOWABLES))
 
     # --- Footer Information ---
     story.append(Spacer(1, 30))
     story.append(HRFlowable(width="100%", thickness=1, color=colors.grey))
     story.append(Spacer(1, 10))
     
-    footer_text = """
-    <b>TumorX AI System</b><br/>
-    Advanced Brain Tumor Detection Platform<br/>
-    Powered by Deep Learning & Computer Vision<br/>
-    For research and educational use only<br/>
-    <i>Generated on {}</i>
-    """.format(datetime.datetime.now().strftime('%B %d, %Y'))
-    
-    story.append(Paragraph(footer_text, ParagraphStyle(
-        'Footer',
-        parent=custom_styles['normal'],
-        fontSize=9,
-        alignment=1,  # Center alignment
-        textColor=colors.grey
-    )))
+    footer_text = _FOOTER_TMPL.substitute(date=now_date)
+    story.append(Paragraph(footer_text, _FOOTER_STYLE))
 
     # --- Build PDF ---
     doc.build(story)
+    if buffer is None:
+        return None
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+
+def generate_pdf_report_async(original, overlay, pred_class, confidence, output=None):
+    """
+    Run generate_pdf_report on a background thread.
+
+    Same arguments as generate_pdf_report; `original`/`overlay` must not be
+    modified until the future completes.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the BytesIO buffer (or None when `output` was given).
+    """
+    return _PDF_EXECUTOR.submit(generate_pdf_report, original, overlay, pred_class, confidence, output)
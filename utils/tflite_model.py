@@ -0,0 +1,102 @@
+import os
+import threading
+import numpy as np
+
+# ---------------------------
+# TFLite-backed model wrapper
+# ---------------------------
+class TFLiteModel:
+    """Minimal stand-in for a Keras model, backed by a TFLite interpreter."""
+
+    def __init__(self, path, num_threads=None):
+        import tensorflow as tf
+
+        # Same thread budget as the TF runtime (see utils/classifier.py)
+        if num_threads is None:
+            num_threads = int(os.environ.get("TF_NUM_INTRAOP_THREADS", 0)) or None
+        self._interp = tf.lite.Interpreter(model_path=path, num_threads=num_threads)
+        self._interp.allocate_tensors()
+        self._in = self._interp.get_input_details()[0]
+        self._out_idx = self._interp.get_output_details()[0]["index"]
+        self.input_shape = tuple(int(d) for d in self._in["shape"])
+        # Shape the input tensor is currently allocated for
+        self._cur_shape = self.input_shape
+        # (scale, zero_point) when the model takes quantized uint8 input
+        self._in_quant = self._in["quantization"] if self._in["dtype"] == np.uint8 else None
+
+    def __call__(self, x, training=False):
+        if self._in_quant and x.dtype != np.uint8:
+            # Float input to an int8 model: quantize at the boundary
+            q_scale, q_zero = self._in_quant
+            x = np.clip(np.rint(x / q_scale + q_zero), 0, 255).astype(np.uint8)
+        if tuple(x.shape) != self._cur_shape:
+            # New batch size or spatial size: reallocate once, then reuse
+            self._interp.resize_tensor_input(self._in["index"], x.shape)
+            self._interp.allocate_tensors()
+            self._cur_shape = tuple(x.shape)
+        self._interp.set_tensor(self._in["index"], x)
+        self._interp.invoke()
+        return self._interp.get_tensor(self._out_idx)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        # Keras-compatible entry point, so call sites need no changes
+        return self(x)
+
+# ---------------------------
+# Shared model loading
+# ---------------------------
+def input_hwc(model):
+    shape = model.input_shape
+    if isinstance(shape, (list, tuple)) and isinstance(shape[0], (list, tuple)):
+        shape = shape[0]
+    _, H, W, C = shape
+    return (H, W, C)
+
+def load_inference_model(path, input_shape=None, dtype=None, num_threads=None):
+    """
+    Load a model for inference and attach the fast-call state both loaders share.
+
+    Args:
+        path: Keras model path. A converted ``.tflite`` next to it (see
+            utils/convert_to_tflite.py) is preferred; it skips the Keras runtime.
+        input_shape: Input signature for the traced Keras graph, e.g. a fixed
+            ``(1, 128, 128, 1)``. Defaults to the model's own input shape with
+            the batch dimension left open.
+        dtype: Input buffer dtype. Defaults to uint8 for a TFLite model with
+            quantized input, float32 otherwise.
+        num_threads: TFLite interpreter threads (see TFLiteModel).
+
+    Returns:
+        The model, with ``_infer`` (ndarray in, ndarray out), ``_in_quant``,
+        ``_hwc``, ``_indtype``, a persistent ``(1, H, W, C)`` ``_inbuf`` and the
+        ``_inlock`` guarding it. The model is warmed up once.
+    """
+    tflite_path = os.path.splitext(path)[0] + ".tflite"
+    if os.path.exists(tflite_path):
+        model = TFLiteModel(tflite_path, num_threads=num_threads)
+        model._infer = model
+    else:
+        # TF/Keras are imported lazily: they cost seconds at import time and
+        # are only needed once the (cached) Keras model is actually built
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+
+        # compile=False ensures it works for inference-only
+        model = load_model(path, compile=False)
+
+        # Trace the inference graph once, so each call is a single graph
+        # execution (no predict() loop). XLA fuses conv/bias/activation
+        # chains and compiles once per input shape.
+        spec = tf.TensorSpec(input_shape or [None, *input_hwc(model)], tf.float32)
+        graph = tf.function(lambda x: model(x, training=False), input_signature=[spec], jit_compile=True)
+        model._infer = lambda x: graph(x).numpy()
+        model._in_quant = None
+
+    # Persistent input buffer; the model is shared across sessions, so
+    # writes into it are serialized with a lock
+    model._hwc = tuple(input_shape[1:]) if input_shape else input_hwc(model)
+    model._indtype = dtype or (np.uint8 if model._in_quant else np.float32)
+    model._inbuf = np.zeros((1, *model._hwc), model._indtype)
+    model._inlock = threading.Lock()
+    model._infer(model._inbuf)  # warm-up
+    return model